@@ -0,0 +1,670 @@
+"""
+Benchmark der Pipeline-Stufen ohne echtes Handy und ohne echtes YouTube-Konto.
+
+- Erzeugt einen synthetischen Foto-/Video-Korpus (Dateinamen wie auf dem Handy)
+- `copy_files_ssh` gegen einen lokalen paramiko-SFTP-Server
+- `create_image_videos` gegen die synthetischen Bilder
+- `get_all_videos` / `upload_video` gegen einen lokalen Fake der YouTube-API (HTTP)
+- Jede Stufe läuft in einem eigenen Prozess, damit Peak-RSS pro Stufe messbar ist
+
+Ergebnis ist JSON (Durchsatz, Latenz-Perzentile, Peak-RSS pro Stufe), damit
+Messungen zwischen Commits verglichen werden können:
+
+    python3 benchmark.py --images 40 --videos 4 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import socket
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import paramiko
+from PIL import Image
+
+SFTP_USER = "bench"
+SFTP_PASSWORD = "bench"
+SFTP_SOURCE = "/dcim/Camera"
+UPLOAD_PLAYLIST_ID = "UUbenchmark"
+STAGES = ["sftp", "render", "catalog", "upload"]
+
+
+# ===================== Synthetischer Korpus =====================
+def generate_corpus(folder, images, videos, dates, image_size, video_seconds, seed=0):
+    """
+    Legt `images` JPEGs (IMG_<date>_<time>_<title>.jpg) verteilt auf `dates` Tage
+    und `videos` MP4s (VID_<date>_<time>.mp4) im Ordner `folder` an.
+    Rauschen statt Farbflächen, damit die Dateigrößen realistisch bleiben.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    titles = ["Urlaub", "Geburtstag", "Ausflug", "Garten", ""]
+    start = datetime(2024, 1, 1, 8, 0, 0)
+
+    for i in range(images):
+        day = start + timedelta(days=i % max(dates, 1), seconds=37 * i)
+        title = titles[(i % max(dates, 1)) % len(titles)]
+        name = f"IMG_{day:%Y%m%d}_{day:%H%M%S}" + (f"_{title}" if title else "") + ".jpg"
+        # Jedes dritte Bild hochkant, wie auf dem Handy
+        w, h = image_size if i % 3 else (image_size[1], image_size[0])
+        pixels = rng.integers(0, 256, size=(h, w, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(os.path.join(folder, name), quality=90)
+
+    for i in range(videos):
+        day = start + timedelta(days=i % max(dates, 1), hours=4, seconds=53 * i)
+        name = f"VID_{day:%Y%m%d}_{day:%H%M%S}.mp4"
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-v", "error",
+                "-f", "lavfi", "-i", f"testsrc=duration={video_seconds}:size=1280x720:rate=24",
+                "-pix_fmt", "yuv420p",
+                os.path.join(folder, name)
+            ],
+            check=True
+        )
+
+
+def folder_size(folder):
+    total = 0
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+
+# ===================== Lokaler SFTP-Server =====================
+class _SSHServer(paramiko.ServerInterface):
+    def check_auth_password(self, username, password):
+        if username == SFTP_USER and password == SFTP_PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class _SFTPHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class _SFTPServer(paramiko.SFTPServerInterface):
+    """Bildet die Remote-Pfade auf einen lokalen Wurzelordner ab."""
+
+    def __init__(self, server, root, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = root
+
+    def _local(self, path):
+        return os.path.join(self.root, self.canonicalize(path).lstrip("/"))
+
+    def list_folder(self, path):
+        local = self._local(path)
+        try:
+            entries = []
+            for name in os.listdir(local):
+                attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)))
+                attr.filename = name
+                entries.append(attr)
+            return entries
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def lstat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.lstat(self._local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    def open(self, path, flags, attr):
+        local = self._local(path)
+        try:
+            fd = os.open(local, flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+
+        handle = _SFTPHandle(flags)
+        handle.filename = local
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(self._local(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+class LocalSFTPServer:
+    """SFTP-Server auf 127.0.0.1 mit zufälligem Port, Wurzel ist `root`."""
+
+    def __init__(self, root):
+        self.root = root
+        self.port = None
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self.transports = []
+        self.sock = None
+
+    def start(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(8)
+        self.port = self.sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(conn)
+            transport.add_server_key(self.host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SFTPServer, self.root)
+            transport.start_server(server=_SSHServer())
+            self.transports.append(transport)
+
+    def stop(self):
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+
+
+# ===================== Lokaler YouTube-Fake =====================
+class _YouTubeHandler(BaseHTTPRequestHandler):
+    """
+    Bedient die Endpunkte, die youtube.py nutzt:
+    channels.list, playlistItems.list, videos.list und den Resumable-Upload von videos.insert.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def do_GET(self):
+        fake = self.server.fake
+        fake.delay()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path.endswith("/channels"):
+            self._send(200, {"items": [{"contentDetails": {"relatedPlaylists": {"uploads": UPLOAD_PLAYLIST_ID}}}]})
+
+        elif url.path.endswith("/playlistItems"):
+            offset = int(query.get("pageToken", ["0"])[0])
+            size = int(query.get("maxResults", ["5"])[0])
+            with fake.lock:
+                page = fake.catalog[offset:offset + size]
+                more = offset + size < len(fake.catalog)
+            payload = {
+                "items": [
+                    {"snippet": {"title": v["title"], "resourceId": {"videoId": v["id"]}}}
+                    for v in page
+                ]
+            }
+            if more:
+                payload["nextPageToken"] = str(offset + size)
+            self._send(200, payload)
+
+        elif url.path.endswith("/videos"):
+            ids = query.get("id", [""])[0].split(",")
+            with fake.lock:
+                items = [
+                    {"id": i, "contentDetails": {"duration": fake.by_id[i]["duration"]}}
+                    for i in ids if i in fake.by_id
+                ]
+            self._send(200, {"items": items})
+
+        else:
+            self._send(404, {"error": {"code": 404, "message": self.path}})
+
+    def do_POST(self):
+        fake = self.server.fake
+        fake.delay()
+        url = urlparse(self.path)
+
+        if not url.path.endswith("/upload/youtube/v3/videos"):
+            self._send(404, {"error": {"code": 404, "message": self.path}})
+            return
+
+        metadata = json.loads(self._read_body() or b"{}")
+        session = uuid.uuid4().hex
+        with fake.lock:
+            fake.sessions[session] = {
+                "metadata": metadata,
+                "total": int(self.headers.get("X-Upload-Content-Length", 0)),
+                "received": 0
+            }
+        host, port = self.server.server_address[:2]
+        self._send(200, headers={"Location": f"http://{host}:{port}/upload/session/{session}"})
+
+    def do_PUT(self):
+        fake = self.server.fake
+        fake.delay()
+        session_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+        chunk = self._read_body()
+
+        with fake.lock:
+            session = fake.sessions.get(session_id)
+            if session is None:
+                self._send(404, {"error": {"code": 404, "message": "unknown upload session"}})
+                return
+            session["received"] += len(chunk)
+            if session["received"] < session["total"]:
+                received = session["received"]
+                done = None
+            else:
+                del fake.sessions[session_id]
+                done = fake.add(session["metadata"].get("snippet", {}).get("title", ""))
+
+        if done is None:
+            self._send(308, headers={"Range": f"bytes=0-{received - 1}"})
+        else:
+            self._send(200, {"id": done["id"], "snippet": {"title": done["title"]}})
+
+
+class FakeYouTube:
+    """Hält Katalog und Upload-Sessions, optional mit künstlicher Latenz pro Request."""
+
+    def __init__(self, catalog_size=0, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.catalog = []
+        self.by_id = {}
+        self.sessions = {}
+        self.server = None
+        for i in range(catalog_size):
+            day = datetime(2015, 1, 1) + timedelta(days=i)
+            self.add(f"VID_{day:%Y%m%d}_120000", duration=f"PT{1 + i % 9}M{i % 60}S")
+
+    def add(self, title, duration="PT0S"):
+        video = {"id": uuid.uuid4().hex[:11], "title": title, "duration": duration}
+        self.catalog.append(video)
+        self.by_id[video["id"]] = video
+        return video
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _YouTubeHandler)
+        self.server.daemon_threads = True
+        self.server.fake = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_fake_youtube_service(root_url):
+    """YouTube-Client aus dem mitgelieferten Discovery-Dokument, aber mit `root_url` als Server."""
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+    from googleapiclient.http import build_http
+
+    document = json.loads(get_static_doc("youtube", "v3"))
+    document["rootUrl"] = root_url
+    document["baseUrl"] = root_url + document["servicePath"]
+    return build_from_document(document, http=build_http(), developerKey="benchmark")
+
+
+# ===================== Stufen (laufen im Kindprozess) =====================
+def stage_sftp(config):
+    from copyfilessh import copy_files_ssh
+
+    latencies = []
+    for i in range(config["repeat"]):
+        destination = os.path.join(config["workdir"], f"sftp_{i}")
+        start = time.perf_counter()
+        copy_files_ssh(
+            host="127.0.0.1", port=config["sftp_port"], user=SFTP_USER, password=SFTP_PASSWORD,
+            source=SFTP_SOURCE, destination=destination, move=False
+        )
+        latencies.append(time.perf_counter() - start)
+        shutil.rmtree(destination)
+
+    return {
+        "latencies": latencies,
+        "items": config["corpus_files"] * config["repeat"],
+        "bytes": config["corpus_bytes"] * config["repeat"]
+    }
+
+
+def stage_render(config):
+    from create_image_video import create_image_videos
+
+    images = [f for f in os.listdir(config["corpus"]) if f.lower().endswith((".jpg", ".jpeg", ".png"))]
+    input_bytes = sum(os.path.getsize(os.path.join(config["corpus"], f)) for f in images)
+
+    latencies = []
+    for i in range(config["repeat"]):
+        folder = os.path.join(config["workdir"], f"render_{i}")
+        os.makedirs(folder)
+        for f in images:
+            shutil.copy(os.path.join(config["corpus"], f), folder)
+        start = time.perf_counter()
+        create_image_videos(folder, video_size=config["video_size"], duration_per_image=config["duration_per_image"])
+        latencies.append(time.perf_counter() - start)
+        shutil.rmtree(folder)
+
+    return {
+        "latencies": latencies,
+        "items": len(images) * config["repeat"],
+        "bytes": input_bytes * config["repeat"]
+    }
+
+
+def stage_catalog(config):
+    from youtube import get_all_videos
+
+    youtube = build_fake_youtube_service(config["youtube_url"])
+    latencies = []
+    items = 0
+    for _ in range(config["repeat"]):
+        start = time.perf_counter()
+        items += len(get_all_videos(youtube, UPLOAD_PLAYLIST_ID))
+        latencies.append(time.perf_counter() - start)
+
+    return {"latencies": latencies, "items": items, "bytes": 0}
+
+
+def stage_upload(config):
+    from youtube import upload_video
+
+    youtube = build_fake_youtube_service(config["youtube_url"])
+    videos = sorted(f for f in os.listdir(config["corpus"]) if f.lower().endswith(".mp4"))
+    latencies = []
+    total_bytes = 0
+    for _ in range(config["repeat"]):
+        for f in videos:
+            path = os.path.join(config["corpus"], f)
+            start = time.perf_counter()
+            upload_video(youtube, path)
+            latencies.append(time.perf_counter() - start)
+            total_bytes += os.path.getsize(path)
+
+    return {"latencies": latencies, "items": len(latencies), "bytes": total_bytes}
+
+
+STAGE_FUNCTIONS = {
+    "sftp": stage_sftp,
+    "render": stage_render,
+    "catalog": stage_catalog,
+    "upload": stage_upload
+}
+
+
+def _maxrss_bytes(who):
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes
+    value = resource.getrusage(who).ru_maxrss
+    return value if sys.platform == "darwin" else value * 1024
+
+
+def _run_stage(name, config, queue):
+    if not config["verbose"]:
+        sys.stdout = open(os.devnull, "w")
+        sys.stderr = open(os.devnull, "w")
+
+    baseline_rss = _maxrss_bytes(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    try:
+        result = STAGE_FUNCTIONS[name](config)
+        result["error"] = None
+    except Exception as e:
+        result = {"latencies": [], "items": 0, "bytes": 0, "error": repr(e)}
+    result["wall_seconds"] = time.perf_counter() - start
+    result["baseline_rss_bytes"] = baseline_rss
+    result["peak_rss_bytes"] = _maxrss_bytes(resource.RUSAGE_SELF)
+    result["peak_rss_children_bytes"] = _maxrss_bytes(resource.RUSAGE_CHILDREN)
+    queue.put(result)
+
+
+# ===================== Auswertung =====================
+def percentile(values, p):
+    """Perzentil mit linearer Interpolation (wie numpy.percentile)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def summarize(raw):
+    latencies = raw["latencies"]
+    busy = sum(latencies)
+    return {
+        "error": raw["error"],
+        "samples": len(latencies),
+        "items": raw["items"],
+        "bytes": raw["bytes"],
+        "wall_seconds": raw["wall_seconds"],
+        "items_per_second": raw["items"] / busy if busy else None,
+        "bytes_per_second": raw["bytes"] / busy if busy else None,
+        "latency_seconds": {
+            "min": min(latencies) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None,
+            "mean": busy / len(latencies) if latencies else None
+        },
+        "baseline_rss_bytes": raw["baseline_rss_bytes"],
+        "peak_rss_bytes": raw["peak_rss_bytes"],
+        "peak_rss_children_bytes": raw["peak_rss_children_bytes"]
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def parse_size(value):
+    w, h = value.lower().split("x")
+    return int(w), int(h)
+
+
+# ===================== Hauptprogramm =====================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Pipeline-Stufen mit lokalen Stand-ins")
+    parser.add_argument("--images", type=int, default=20, help="Anzahl synthetischer Bilder")
+    parser.add_argument("--videos", type=int, default=3, help="Anzahl synthetischer Videos")
+    parser.add_argument("--dates", type=int, default=2, help="Auf wie viele Tage die Dateien verteilt werden")
+    parser.add_argument("--image-size", type=parse_size, default=(4000, 3000), help="Bildgröße, z.B. 4000x3000")
+    parser.add_argument("--video-seconds", type=int, default=5, help="Länge der synthetischen Videos")
+    parser.add_argument("--video-size", type=parse_size, default=(1920, 1080), help="Größe der Slideshows")
+    parser.add_argument("--duration-per-image", type=float, default=3)
+    parser.add_argument("--catalog-size", type=int, default=500, help="Videos im Fake-Kanal")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Künstliche Latenz pro API-Request in Sekunden")
+    parser.add_argument("--repeat", type=int, default=3, help="Wiederholungen pro Stufe")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Kommagetrennt aus {','.join(STAGES)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON-Datei für die Ergebnisse (sonst stdout)")
+    parser.add_argument("--verbose", action="store_true", help="Ausgaben der Stufen nicht unterdrücken")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGE_FUNCTIONS]
+    if unknown:
+        parser.error(f"Unbekannte Stufe(n): {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="rasp-bench-")
+    sftp_root = os.path.join(workdir, "phone")
+    corpus = os.path.join(sftp_root, SFTP_SOURCE.lstrip("/"))
+
+    sftp_server = None
+    youtube = None
+    try:
+        print(f"Erzeuge Korpus in {corpus}", file=sys.stderr)
+        generate_corpus(
+            corpus, args.images, args.videos, args.dates,
+            args.image_size, args.video_seconds, seed=args.seed
+        )
+
+        sftp_server = LocalSFTPServer(sftp_root)
+        sftp_server.start()
+        youtube = FakeYouTube(catalog_size=args.catalog_size, latency=args.api_latency)
+        youtube.start()
+
+        config = {
+            "workdir": workdir,
+            "corpus": corpus,
+            "corpus_files": len(os.listdir(corpus)),
+            "corpus_bytes": folder_size(corpus),
+            "sftp_port": sftp_server.port,
+            "youtube_url": youtube.url,
+            "video_size": args.video_size,
+            "duration_per_image": args.duration_per_image,
+            "repeat": args.repeat,
+            "verbose": args.verbose
+        }
+
+        # Jede Stufe in einem frischen Prozess -> Peak-RSS gehört nur zu dieser Stufe
+        ctx = multiprocessing.get_context("spawn")
+        results = {}
+        for name in stages:
+            print(f"Stufe {name} ...", file=sys.stderr)
+            results_queue = ctx.Queue()
+            process = ctx.Process(target=_run_stage, args=(name, config, results_queue))
+            process.start()
+            while True:
+                try:
+                    raw = results_queue.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if not process.is_alive():
+                        raw = {
+                            "latencies": [], "items": 0, "bytes": 0, "wall_seconds": 0,
+                            "error": f"Prozess beendet mit Exit-Code {process.exitcode}",
+                            "baseline_rss_bytes": None, "peak_rss_bytes": None, "peak_rss_children_bytes": None
+                        }
+                        break
+            process.join()
+            results[name] = summarize(raw)
+            print(f"Stufe {name} fertig in {raw['wall_seconds']:.1f} Sekunden", file=sys.stderr)
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "params": {
+                    "images": args.images,
+                    "videos": args.videos,
+                    "dates": args.dates,
+                    "image_size": list(args.image_size),
+                    "video_seconds": args.video_seconds,
+                    "video_size": list(args.video_size),
+                    "duration_per_image": args.duration_per_image,
+                    "catalog_size": args.catalog_size,
+                    "api_latency": args.api_latency,
+                    "repeat": args.repeat,
+                    "seed": args.seed
+                },
+                "corpus_files": config["corpus_files"],
+                "corpus_bytes": config["corpus_bytes"]
+            },
+            "stages": results
+        }
+    finally:
+        if sftp_server:
+            sftp_server.stop()
+        if youtube:
+            youtube.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Ergebnisse gespeichert: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    return 1 if any(r["error"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
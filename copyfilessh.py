@@ -3,6 +3,7 @@ import time
 import stat
 import paramiko
 from paramiko import SSHConfig
+import metrics
 
 def progress(filename, transferred, total):
     percent = transferred / total * 100 if total else 100
@@ -21,7 +22,15 @@ def progress(filename, transferred, total):
     if transferred >= total:
         print()
 
-def copy_files_ssh(host, port, user, password, source, destination, move=False):
+def copy_files_ssh(host, port, user, password, source, destination, move=False,
+                   file_filter=None, reserve=None, throttle=None):
+    """
+    Kopiert `source` rekursiv zwischen lokalem PC und Server, die Richtung wird automatisch bestimmt.
+    - `file_filter(name)`: nur Dateien kopieren, für die True zurückkommt
+    - `reserve(size)`: vor jeder Datei aufgerufen, bei False bleibt die Datei liegen (Platz-Budget)
+    - `throttle(nbytes)`: nach jedem übertragenen Block aufgerufen (Bandbreiten-Budget)
+    Gibt die Dauer in Sekunden zurück.
+    """
 
     # --- Verbindung zum Server ---
     ssh = paramiko.SSHClient()
@@ -40,6 +49,27 @@ def copy_files_ssh(host, port, user, password, source, destination, move=False):
         except FileNotFoundError:
             raise FileNotFoundError(f"Source not found on local PC or server: {source}")
 
+    def callback(src):
+        last = [0]
+
+        def on_progress(transferred, total):
+            if throttle:
+                throttle(transferred - last[0])
+                last[0] = transferred
+            progress(src, transferred, total)
+        return on_progress
+
+    def skip(src, size):
+        if file_filter and not file_filter(os.path.basename(src)):
+            return True
+        if reserve and not reserve(size):
+            print(f"{os.path.basename(src)}: Budget erschöpft, bleibt liegen")
+            return True
+        return False
+
+    # Mit Drossel nur begrenzt vorausladen, sonst puffert paramiko die ganze Datei im Speicher
+    get_options = {"max_concurrent_prefetch_requests": 16} if throttle else {}
+
     # --- Upload / Download Funktionen ---
     def upload(src, dst):
         if os.path.isdir(src):
@@ -47,24 +77,46 @@ def copy_files_ssh(host, port, user, password, source, destination, move=False):
                 sftp.mkdir(dst)
             except IOError:
                 pass
-            for item in os.listdir(src):
+            with metrics.stage("sftp_scan"):
+                items = os.listdir(src)
+            metrics.count("sftp_scan")
+            for item in items:
                 upload(os.path.join(src, item), f"{dst.rstrip('/')}/{item}")
         else:
-            sftp.put(src, dst, callback=lambda x, y: progress(src, x, y))
+            if skip(src, os.path.getsize(src)):
+                return
+            with metrics.stage("sftp_transfer"):
+                sftp.put(src, dst, callback=callback(src))
+            metrics.count("sftp_transfer", nbytes=os.path.getsize(src))
             if move:
                 os.remove(src)
 
     def download(src, dst):
-        info = sftp.stat(src)
+        # stat pro Datei als eigene Stufe, sftp_scan misst nur das Auflisten der Verzeichnisse
+        with metrics.stage("sftp_stat"):
+            info = sftp.stat(src)
+        metrics.count("sftp_stat")
         if stat.S_ISDIR(info.st_mode):
             os.makedirs(dst, exist_ok=True)
-            for item in sftp.listdir(src):
+            with metrics.stage("sftp_scan"):
+                items = sftp.listdir(src)
+            metrics.count("sftp_scan")
+            for item in items:
                 download(f"{src.rstrip('/')}/{item}", os.path.join(dst, item))
             if move:
-                sftp.rmdir(src)
+                try:
+                    sftp.rmdir(src)
+                except IOError:
+                    pass  # nicht leer, z.B. gefilterte oder zurückgestellte Dateien
         else:
+            if skip(src, info.st_size):
+                return
             os.makedirs(os.path.dirname(dst), exist_ok=True)
-            sftp.get(src, dst, callback=lambda x, y: progress(src, x, y))
+            # Erst als .part laden und danach umbenennen -> abgebrochene Kopien bleiben nie als halbe Datei liegen
+            with metrics.stage("sftp_transfer"):
+                sftp.get(src, dst + ".part", callback=callback(src), **get_options)
+                os.replace(dst + ".part", dst)
+            metrics.count("sftp_transfer", nbytes=os.path.getsize(dst))
             if move:
                 sftp.remove(src)
 
@@ -5,8 +5,35 @@ import numpy as np
 from moviepy.video.VideoClip import ImageClip
 from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
 from moviepy import concatenate_videoclips
+import metrics
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+VIDEO_EXTENSIONS = ('.mts', '.mts2', '.m2ts', '.avi', '.vob', '.mp4', '.mpg')
+
+# Quelle am Ende von Video-Namen/-Titeln: VID_<date>_<title>--<source>
+SOURCE_SEPARATOR = "--"
 
 # ===================== Hilfsfunktion =====================
+def tag_with_source(name, source):
+    """Hängt die Quelle an, damit gleichnamige Videos verschiedener Geräte unterscheidbar bleiben."""
+    if not source or name.endswith(SOURCE_SEPARATOR + source):
+        return name
+    return f"{name}{SOURCE_SEPARATOR}{source}"
+
+def parse_image_name(file):
+    """
+    Datum und Titel aus IMG_<date>_<time>_<title>.jpg.
+    Gibt None zurück, wenn der Name nicht diesem Schema folgt.
+    """
+    name, _ = os.path.splitext(file)
+    parts = name.split('_', 3)
+    if len(parts) < 3:
+        return None
+
+    date = parts[1]
+    title = parts[3] if len(parts) > 3 else ""
+    return date, title
+
 def load_image_correct_orientation(path):
     """
     Lädt ein Bild mit korrekter EXIF-Orientierung.
@@ -34,14 +61,62 @@ def load_image_correct_orientation(path):
 
     return img
 
+def render_date_video(date, images, titles, output_folder, video_size, duration_per_image, source=""):
+    """
+    Erstellt das Video für ein Datum aus den Bildern `images`.
+    Gibt den Pfad des Videos zurück (None, wenn keine Bilder vorhanden sind).
+    """
+    images.sort()  # chronologisch
+    clips = []
+    first_title_for_video = ""
+
+    for img_path in images:
+        pil_img = load_image_correct_orientation(img_path)
+        img_clip = ImageClip(np.array(pil_img))
+
+        # Skalierungsfaktor (maximal ins Video einpassen)
+        scale = min(video_size[0] / img_clip.w, video_size[1] / img_clip.h)
+        img_clip = (
+            img_clip
+            .resized(new_size=(int(img_clip.w * scale), int(img_clip.h * scale)))
+            .with_duration(duration_per_image)
+            .with_position("center", "center")
+        )
+
+        # Schwarzer Hintergrund
+        final_clip = CompositeVideoClip([img_clip], size=video_size, bg_color=(0,0,0))
+        clips.append(final_clip)
+
+        if not first_title_for_video:
+            first_title_for_video = titles.get(img_path, "")
+
+    # Alle Clips zusammenfügen
+    if clips:
+        video = concatenate_videoclips(clips, method="compose")
+
+        # Videoname
+        safe_title = first_title_for_video.replace(" ", "_").replace(".", "")
+        output_name = f"VID_{date}_{safe_title}" if safe_title else f"VID_{date}"
+        output_filename = tag_with_source(output_name, source) + ".mp4"
+        output_path = os.path.join(output_folder, output_filename)
+
+        video.write_videofile(output_path, fps=24)
+        print(f"Video erstellt: {output_path}")
+        return output_path
+
+    return None
+
 # ===================== Hauptfunktion =====================
-def create_image_videos(image_folder, video_size=(1920, 1080), duration_per_image=3):
+def create_image_videos(image_folder, video_size=(1920, 1080), duration_per_image=3, skip_dates=(), on_rendered=None, source=""):
     """
     Erstellt Videos pro Datum aus Bildern im Ordner `image_folder`.
     - Bilder werden nach Datum im Dateinamen gruppiert (IMG_<date>_<time>_<title>.jpg)
     - Jedes Bild wird für `duration_per_image` Sekunden gezeigt
     - Bilder behalten ihre Originalgröße, schwarze Balken füllen den Rest
     - Videos werden im Ordner 'videos' gespeichert
+    - Daten in `skip_dates` sind schon gerendert und werden übersprungen
+    - `on_rendered(date, output_path)` wird nach jedem fertigen Video aufgerufen
+    - `source` wird an den Videonamen angehängt (VID_<date>_<title>--<source>.mp4)
     """
     if not os.path.exists(image_folder):
         print(f"Ordner existiert nicht: {image_folder}")
@@ -51,59 +126,32 @@ def create_image_videos(image_folder, video_size=(1920, 1080), duration_per_imag
     os.makedirs(output_folder, exist_ok=True)
 
     # Alle Bilddateien im Ordner
-    files = [f for f in os.listdir(image_folder) if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+    files = [f for f in os.listdir(image_folder) if f.lower().endswith(IMAGE_EXTENSIONS)]
 
     # Gruppieren nach Datum (IMG_<date>_<time>_<title>.jpg)
     grouped = {}
     titles = {}
     for file in files:
-        name, _ = os.path.splitext(file)
-        parts = name.split('_', 3)
-        if len(parts) < 3:
+        parsed = parse_image_name(file)
+        if parsed is None:
             continue
 
-        date = parts[1]
-        title = parts[3] if len(parts) > 3 else ""
+        date, title = parsed
         grouped.setdefault(date, []).append(os.path.join(image_folder, file))
         titles[os.path.join(image_folder, file)] = title
 
     # Videos pro Datum erstellen
     for date, images in grouped.items():
-        images.sort()  # chronologisch
-        clips = []
-        first_title_for_video = ""
-
-        for img_path in images:
-            pil_img = load_image_correct_orientation(img_path)
-            img_clip = ImageClip(np.array(pil_img))
-
-            # Skalierungsfaktor (maximal ins Video einpassen)
-            scale = min(video_size[0] / img_clip.w, video_size[1] / img_clip.h)
-            img_clip = (
-                img_clip
-                .resized(new_size=(int(img_clip.w * scale), int(img_clip.h * scale)))
-                .with_duration(duration_per_image)
-                .with_position("center", "center")
-            )
-
-            # Schwarzer Hintergrund
-            final_clip = CompositeVideoClip([img_clip], size=video_size, bg_color=(0,0,0))
-            clips.append(final_clip)
-
-            if not first_title_for_video:
-                first_title_for_video = titles.get(img_path, "")
-
-        # Alle Clips zusammenfügen
-        if clips:
-            video = concatenate_videoclips(clips, method="compose")
-
-            # Videoname
-            safe_title = first_title_for_video.replace(" ", "_").replace(".", "")
-            output_filename = f"VID_{date}_{safe_title}.mp4" if safe_title else f"VID_{date}.mp4"
-            output_path = os.path.join(output_folder, output_filename)
-
-            video.write_videofile(output_path, fps=24)
-            print(f"Video erstellt: {output_path}")
+        if date in skip_dates:
+            print(f"Video für {date} bereits erstellt, überspringen")
+            continue
+
+        with metrics.stage("render"):
+            output_path = render_date_video(date, images, titles, output_folder, video_size, duration_per_image, source)
+        if output_path:
+            metrics.count("render", items=len(images), nbytes=os.path.getsize(output_path))
+        if on_rendered:
+            on_rendered(date, output_path)
 
 # ===================== Hauptprogramm =====================
 def main():
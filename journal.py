@@ -0,0 +1,156 @@
+"""
+Job-Journal, damit ein neuer Trigger abgebrochene Läufe fortsetzt statt neu zu beginnen.
+
+Pro kopiertem Ordner (/handy/<ts>) wird festgehalten:
+- welche Daten schon als Slideshow gerendert sind (Datum -> Video)
+- welche Dateien schon hochgeladen sind (mit dem YouTube-Eintrag)
+- ob Rendern / Hochladen des Ordners abgeschlossen ist
+- welche Dateien in keinem Video gelandet sind (Ordner bleibt dann liegen)
+Dazu global, ob die HTML-Seite noch neu gebaut werden muss (nur nach echten Uploads).
+
+Jede Änderung wird sofort atomar geschrieben (temporäre Datei + fsync + rename).
+"""
+import os
+import re
+import json
+import threading
+
+JOURNAL_FILE = os.environ.get("JOURNAL_FILE", "/handy/journal.json")
+
+# Ordnernamen, die copy_handy_media anlegt (<YYYYmmdd>_<HHMMSS>[_<Quelle>])
+FOLDER_PATTERN = re.compile(r"^\d{8}_\d{6}(_.+)?$")
+
+
+class JobJournal:
+
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {"folders": {}, "html_pending": False}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Journal {path} nicht lesbar, beginne neu:", e)
+
+    def _save(self):
+        # Aufrufer hält self.lock
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _folder(self, path):
+        # Aufrufer hält self.lock
+        entry = self.data["folders"].setdefault(os.path.abspath(path), {
+            "rendered": {},
+            "render_done": False,
+            "uploaded": {},
+            "upload_done": False,
+            "kept": []
+        })
+        entry.setdefault("kept", [])
+        if isinstance(entry["rendered"], list):
+            # Älteres Journal ohne Videopfade
+            entry["rendered"] = {date: None for date in entry["rendered"]}
+        return entry
+
+    # --- Ordner ---
+    def add_folder(self, path, **info):
+        """Registriert einen (fertig kopierten) Ordner, `info` wird mit abgelegt."""
+        with self.lock:
+            self._folder(path).update(info)
+            self._save()
+
+    def remove_folder(self, path):
+        with self.lock:
+            self.data["folders"].pop(os.path.abspath(path), None)
+            self._save()
+
+    def folder_info(self, path):
+        with self.lock:
+            return dict(self._folder(path))
+
+    def pending_folders(self, root):
+        """
+        Alle Ordner mit offener Arbeit, älteste zuerst.
+        Ordner unter `root`, die das Journal nicht kennt (Läufe vor dem Journal), werden übernommen;
+        Einträge, deren Ordner nicht mehr existiert, werden verworfen.
+        """
+        with self.lock:
+            folders = self.data["folders"]
+            for path in list(folders):
+                if not os.path.isdir(path):
+                    del folders[path]
+
+            if os.path.isdir(root):
+                for name in os.listdir(root):
+                    path = os.path.abspath(os.path.join(root, name))
+                    if FOLDER_PATTERN.match(name) and os.path.isdir(path):
+                        self._folder(path)
+
+            self._save()
+            return sorted(p for p, entry in folders.items() if not entry["upload_done"])
+
+    # --- Rendern ---
+    def rendered_dates(self, path):
+        with self.lock:
+            return set(self._folder(path)["rendered"])
+
+    def rendered_videos(self, path):
+        """Datum -> Pfad des Videos relativ zum Ordner."""
+        with self.lock:
+            return dict(self._folder(path)["rendered"])
+
+    def mark_rendered(self, path, date, video_path=None):
+        with self.lock:
+            if video_path is not None:
+                video_path = os.path.relpath(video_path, path)
+            self._folder(path)["rendered"][date] = video_path
+            self._save()
+
+    def render_done(self, path):
+        with self.lock:
+            return self._folder(path)["render_done"]
+
+    def mark_render_done(self, path):
+        with self.lock:
+            self._folder(path)["render_done"] = True
+            self._save()
+
+    # --- Hochladen ---
+    def uploaded(self, path):
+        """Bereits hochgeladene Dateien des Ordners: relativer Pfad -> YouTube-Eintrag."""
+        with self.lock:
+            return dict(self._folder(path)["uploaded"])
+
+    def mark_uploaded(self, path, file, video_entry, new_upload=True):
+        """Merkt `file` als auf YouTube vorhanden; nur neue Uploads machen die HTML-Seite veraltet."""
+        with self.lock:
+            self._folder(path)["uploaded"][file] = video_entry
+            if new_upload:
+                self.data["html_pending"] = True
+            self._save()
+
+    def mark_upload_done(self, path, kept=()):
+        """Ordner fertig; `kept` sind Dateien ohne hochgeladenes Video, der Ordner bleibt dann liegen."""
+        with self.lock:
+            entry = self._folder(path)
+            entry["upload_done"] = True
+            entry["kept"] = list(kept)
+            self._save()
+
+    # --- HTML ---
+    @property
+    def html_pending(self):
+        with self.lock:
+            return self.data["html_pending"]
+
+    def mark_html_done(self):
+        with self.lock:
+            self.data["html_pending"] = False
+            self._save()
@@ -0,0 +1,218 @@
+"""
+Metriken für die Pipeline-Stufen.
+
+- Zähler, Byte-Summen, Dauern und In-Flight-Gauges pro Stufe
+- Ausgabe im Prometheus-Textformat für den /metrics-Endpunkt
+- Pro Job ein JSON-Bericht mit den Zeiten aller Stufen (JOBS_DIR/<job_id>/report.json)
+- Optional Profiling pro Stufe (siehe profiling.py), Artefakte neben report.json
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from profiling import JobProfiler, profile_mode
+
+JOBS_DIR = os.environ.get("JOBS_DIR", "/handy/jobs")
+
+# Name -> (Typ, Hilfetext)
+METRICS = {
+    "rasp_stage_runs_total": ("counter", "Durchläufe pro Stufe und Status"),
+    "rasp_stage_duration_seconds": ("summary", "Dauer der Stufen in Sekunden"),
+    "rasp_stage_in_progress": ("gauge", "Aktuell laufende Stufen"),
+    "rasp_stage_items_total": ("counter", "Verarbeitete Einheiten pro Stufe (Dateien, Videos, aufgelistete Verzeichnisse, stat-Aufrufe)"),
+    "rasp_stage_bytes_total": ("counter", "Verarbeitete Bytes pro Stufe"),
+    "rasp_jobs_total": ("counter", "Beendete Jobs pro Status"),
+    "rasp_job_in_progress": ("gauge", "Aktuell laufende Jobs"),
+    "rasp_last_job_duration_seconds": ("gauge", "Dauer des letzten Jobs in Sekunden"),
+    "rasp_last_job_finished_timestamp_seconds": ("gauge", "Ende des letzten Jobs (Unix-Zeit)"),
+}
+
+_lock = threading.Lock()
+_samples = {}       # Name -> {(Suffix, Labels): Wert}
+_job = None         # Laufender Job
+_last_report = None
+
+
+# ===================== Rohwerte =====================
+def _add(name, value, labels=(), suffix=""):
+    with _lock:
+        family = _samples.setdefault(name, {})
+        key = (suffix, tuple(labels))
+        family[key] = family.get(key, 0) + value
+
+
+def _set(name, value, labels=()):
+    with _lock:
+        _samples.setdefault(name, {})[("", tuple(labels))] = value
+
+
+def _job_stage(name, started=None):
+    # Aufrufer hält _lock; `started` ist der perf_counter-Wert beim Betreten der Stufe
+    offset = round((time.perf_counter() if started is None else started) - _job["_start"], 3)
+    entry = _job["stages"].setdefault(name, {
+        "runs": 0,
+        "errors": 0,
+        "seconds": 0.0,
+        "items": 0,
+        "bytes": 0,
+        "first_started_offset_seconds": offset
+    })
+    # count() kann den Eintrag schon während der ersten Stufe angelegt haben
+    entry["first_started_offset_seconds"] = min(entry["first_started_offset_seconds"], offset)
+    return entry
+
+
+# ===================== Stufen =====================
+@contextmanager
+def stage(name):
+    """
+    Misst eine Stufe: In-Flight-Gauge, Dauer, Status und Eintrag im Job-Bericht.
+    Ausnahmen werden als Fehler gezählt und weitergereicht.
+    """
+    labels = (("stage", name),)
+    _add("rasp_stage_in_progress", 1, labels)
+    with _lock:
+        profiler = _job["_profiler"] if _job is not None else None
+    token = profiler.begin(name) if profiler else None
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        if profiler:
+            profiler.end(name, token)
+        _add("rasp_stage_in_progress", -1, labels)
+        _add("rasp_stage_duration_seconds", duration, labels, "_sum")
+        _add("rasp_stage_duration_seconds", 1, labels, "_count")
+        _add("rasp_stage_runs_total", 1, labels + (("status", status),))
+        with _lock:
+            if _job is not None:
+                entry = _job_stage(name, start)
+                entry["runs"] += 1
+                entry["seconds"] += duration
+                if status == "error":
+                    entry["errors"] += 1
+
+
+def count(name, items=1, nbytes=0):
+    """Zählt verarbeitete Einheiten und Bytes für die Stufe `name`."""
+    labels = (("stage", name),)
+    if items:
+        _add("rasp_stage_items_total", items, labels)
+    if nbytes:
+        _add("rasp_stage_bytes_total", nbytes, labels)
+    with _lock:
+        if _job is not None:
+            entry = _job_stage(name)
+            entry["items"] += items
+            entry["bytes"] += nbytes
+
+
+# ===================== Jobs =====================
+def start_job(profile=False):
+    """
+    Beginnt einen neuen Job-Bericht und gibt die Job-ID zurück.
+    Mit `profile` ("cpu", "mem", "all" oder True für "cpu") wird jede Stufe profiliert.
+    """
+    global _job
+    job_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    mode = profile_mode(profile)
+    with _lock:
+        _job = {
+            "job_id": job_id,
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "_start": time.perf_counter(),
+            "_profiler": JobProfiler(mode) if mode else None,
+            "stages": {}
+        }
+    _add("rasp_job_in_progress", 1)
+    return job_id
+
+
+def job_dir(job_id):
+    path = os.path.join(JOBS_DIR, job_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def finish_job(error=None):
+    """
+    Schließt den laufenden Job ab und schreibt den Bericht nach JOBS_DIR/<job_id>/report.json.
+    Der Job gilt als fehlgeschlagen, wenn `error` gesetzt ist oder eine Stufe fehlschlug.
+    """
+    global _job, _last_report
+    with _lock:
+        job, _job = _job, None
+    if job is None:
+        return None
+
+    duration = time.perf_counter() - job.pop("_start")
+    profiler = job.pop("_profiler")
+    failed = error is not None or any(s["errors"] for s in job["stages"].values())
+    status = "error" if failed else "ok"
+
+    report = {
+        **job,
+        "finished": datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": round(duration, 3),
+        "status": status,
+        "error": repr(error) if error is not None else None
+    }
+    for entry in report["stages"].values():
+        entry["seconds"] = round(entry["seconds"], 3)
+
+    _add("rasp_job_in_progress", -1)
+    _add("rasp_jobs_total", 1, (("status", status),))
+    _set("rasp_last_job_duration_seconds", duration)
+    _set("rasp_last_job_finished_timestamp_seconds", time.time())
+
+    try:
+        folder = job_dir(report["job_id"])
+        if profiler:
+            report["profile_artifacts"] = profiler.write(folder)
+        path = os.path.join(folder, "report.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        print("Fehler beim Schreiben des Job-Berichts:", e)
+        path = None
+    finally:
+        with _lock:
+            _last_report = report
+    return path
+
+
+def last_report():
+    with _lock:
+        return _last_report
+
+
+# ===================== Prometheus =====================
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus():
+    """Alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+    with _lock:
+        snapshot = {name: dict(family) for name, family in _samples.items()}
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (suffix, labels), value in sorted(snapshot.get(name, {}).items()):
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
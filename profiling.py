@@ -0,0 +1,227 @@
+"""
+Profiling der Pipeline-Stufen (aktiv mit POST /start?profile=<modus> oder PROFILE_JOBS=<modus>).
+
+Modi:
+- cpu (auch 1/true): cProfile, Wall-Clock und CPU-Zeiten
+- mem: tracemalloc mit 10 Frames, Wall-Clock und CPU-Zeiten
+- all: beides, tracemalloc dann mit nur einem Frame
+tracemalloc verteuert jede Allokation (auch mit einem Frame etwa 8x für eine reine
+String-Bau-Schleife, cProfile allein etwa 2x). In "all" schieben sich die Profile deshalb
+zu allokationslastigem Code wie dem HTML-Bau in generate_html; für Zeiten "cpu" nehmen.
+Auch ohne tracemalloc misst cProfile mit eigenem Overhead pro Funktionsaufruf, viele
+kleine Aufrufe wirken also teurer als sie sind.
+
+Stufen werden in jedem Thread erfasst, auch in den Worker-Threads von fetch_sources.
+Pro Stufe:
+- CPU-Profil (cProfile) -> profile_<stage>.prof
+  Ansehen mit `python -m pstats profile_render.prof` oder `snakeviz profile_render.prof`
+  Bis Python 3.11 erfasst cProfile nur den Thread, der es einschaltet: jeder Thread bekommt
+  ein eigenes Profil für seine innerste Stufe (die äußere pausiert solange), beim Schreiben
+  werden alle Profile einer Stufe zusammengeführt.
+  Ab 3.12 baut cProfile auf sys.monitoring auf: ein Profil erfasst alle Threads des Prozesses
+  (auch paramiko und Flask), und es kann immer nur ein Profil gleichzeitig aktiv sein. Das
+  bekommt die zuerst gestartete Stufe, gleichnamige parallele Stufen laufen mit hinein;
+  andere Stufen, die währenddessen laufen, tauchen nur in dessen Aufrufbaum auf.
+- Wall-Clock, CPU-Zeit des Prozesses (alle Threads, also auch paramiko)
+  und der Kindprozesse (ffmpeg/ffprobe von moviepy); parallele Läufe zählen jeweils voll
+- tracemalloc-Peak pro Stufe und Speicher-Snapshot des größten Laufs (Modi mem und all)
+  -> memory_<stage>.snapshot (tracemalloc.Snapshot.load)
+Zusammenfassung in profile.json neben report.json.
+"""
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import resource
+import threading
+import tracemalloc
+
+# Ab Python 3.12 sieht ein cProfile alle Threads, und nur eins darf aktiv sein
+CPROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+PROFILE_MODES = ("cpu", "mem", "all")
+
+
+def _children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _maxrss_bytes():
+    # ru_maxrss ist unter Linux in KiB, unter macOS in Bytes
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return value if sys.platform == "darwin" else value * 1024
+
+
+def profile_mode(value):
+    """
+    Profiling-Modus aus ?profile= bzw. PROFILE_JOBS: "cpu", "mem" oder "all" (beides),
+    None für aus ("", "0", "false", "no"). Andere Werte wie "1" bedeuten "cpu".
+    """
+    if value is None or value is False:
+        return None
+    value = "cpu" if value is True else str(value).strip().lower()
+    if value in ("", "0", "false", "no"):
+        return None
+    return value if value in PROFILE_MODES else "cpu"
+
+
+class JobProfiler:
+    """Sammelt Profile pro Stufe aus allen Threads (siehe oben)."""
+
+    def __init__(self, mode="cpu", frames=None):
+        self.mode = mode
+        self.cpu = mode in ("cpu", "all")
+        self.memory = mode in ("mem", "all")
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles = {}
+        self.stages = {}
+        self.snapshots = {}
+        self.running = 0
+        self.shared = None
+        self.started_tracemalloc = self.memory and not tracemalloc.is_tracing()
+        if self.started_tracemalloc:
+            # Zusammen mit cProfile nur ein Frame, jeder weitere verteuert jede Allokation
+            tracemalloc.start(frames or (10 if mode == "mem" else 1))
+
+    def _stack(self):
+        # Laufende Stufen des aktuellen Threads, innerste zuletzt
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def begin(self, name):
+        with self.lock:
+            token = {
+                "wall": time.perf_counter(),
+                "cpu": time.process_time(),
+                "children_cpu": _children_cpu_seconds(),
+                "profile": None
+            }
+            if self.memory:
+                # Peak nur zurücksetzen, wenn keine andere Stufe mehr misst
+                if not self.running:
+                    tracemalloc.reset_peak()
+                token["traced"] = tracemalloc.get_traced_memory()[0]
+            self.running += 1
+            if self.cpu:
+                self._enable(name, token)
+        return token
+
+    def _enable(self, name, token):
+        # Aufrufer hält self.lock
+        if CPROFILE_ALL_THREADS:
+            if self.shared is None:
+                profile = self.profiles.setdefault(name, [cProfile.Profile()])[0]
+                try:
+                    profile.enable()
+                except ValueError:
+                    # anderes Profiling-Werkzeug aktiv (z.B. Job unter python -m cProfile)
+                    return
+                self.shared = {"name": name, "profile": profile, "users": 0}
+            if self.shared["name"] == name:
+                self.shared["users"] += 1
+                token["profile"] = self.shared["profile"]
+        else:
+            stack = self._stack()
+            if stack:
+                stack[-1]["profile"].disable()
+            token["profile"] = cProfile.Profile()
+            self.profiles.setdefault(name, []).append(token["profile"])
+            stack.append(token)
+            token["profile"].enable()
+
+    def _disable(self, token):
+        # Aufrufer hält self.lock
+        if CPROFILE_ALL_THREADS:
+            if token["profile"] is not None:
+                self.shared["users"] -= 1
+                if not self.shared["users"]:
+                    self.shared["profile"].disable()
+                    self.shared = None
+        else:
+            token["profile"].disable()
+            stack = self._stack()
+            stack.pop()
+            if stack:
+                stack[-1]["profile"].enable()
+
+    def end(self, name, token):
+        if token is None:
+            return
+        with self.lock:
+            self.running -= 1
+            if self.cpu:
+                self._disable(token)
+            self._record(name, token)
+
+    def _record(self, name, token):
+        # Aufrufer hält self.lock
+        entry = self.stages.setdefault(name, {
+            "runs": 0,
+            "wall_seconds": 0.0,
+            "cpu_seconds": 0.0,
+            "children_cpu_seconds": 0.0,
+            "max_rss_bytes": 0
+        })
+        entry["runs"] += 1
+        entry["wall_seconds"] += time.perf_counter() - token["wall"]
+        entry["cpu_seconds"] += time.process_time() - token["cpu"]
+        entry["children_cpu_seconds"] += _children_cpu_seconds() - token["children_cpu"]
+        entry["max_rss_bytes"] = max(entry["max_rss_bytes"], _maxrss_bytes())
+        if not self.memory:
+            return
+
+        traced, peak = tracemalloc.get_traced_memory()
+        entry.setdefault("tracemalloc_peak_bytes", 0)
+        entry["tracemalloc_retained_bytes"] = entry.get("tracemalloc_retained_bytes", 0) + traced - token["traced"]
+
+        # Snapshot nur vom Lauf mit dem bisher höchsten Peak
+        stage_peak = peak - token["traced"]
+        if stage_peak > entry["tracemalloc_peak_bytes"]:
+            entry["tracemalloc_peak_bytes"] = stage_peak
+            self.snapshots[name] = tracemalloc.take_snapshot()
+
+    def write(self, folder):
+        """Schreibt alle Artefakte nach `folder` und gibt die Liste der Dateinamen zurück."""
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        artifacts = []
+        summary = {"mode": self.mode, "stages": {}}
+        if self.cpu:
+            summary["cprofile_threads"] = "ein Profil für alle Threads" if CPROFILE_ALL_THREADS else "ein Profil pro Thread, zusammengeführt"
+        for name, entry in self.stages.items():
+            # Profile aller Threads und Läufe zusammenführen (leere mag pstats nicht)
+            profiles = []
+            for profile in self.profiles.get(name, []):
+                profile.create_stats()
+                if profile.stats:
+                    profiles.append(profile)
+            if profiles:
+                stats = pstats.Stats(*profiles)
+                prof_file = f"profile_{name}.prof"
+                stats.dump_stats(os.path.join(folder, prof_file))
+                artifacts.append(prof_file)
+
+            top = []
+            snapshot = self.snapshots.get(name)
+            if snapshot is not None:
+                snap_file = f"memory_{name}.snapshot"
+                snapshot.dump(os.path.join(folder, snap_file))
+                artifacts.append(snap_file)
+                for stat in snapshot.statistics("lineno")[:10]:
+                    frame = stat.traceback[0]
+                    top.append({"location": f"{frame.filename}:{frame.lineno}", "bytes": stat.size, "count": stat.count})
+
+            summary["stages"][name] = {k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()}
+            if self.memory:
+                summary["stages"][name]["top_allocations"] = top
+
+        with open(os.path.join(folder, "profile.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        artifacts.append("profile.json")
+        return artifacts
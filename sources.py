@@ -0,0 +1,254 @@
+"""
+Quellen für neue Medien (Handys per SFTP, Kamerakarten als lokaler Pfad).
+
+Konfiguration in SOURCES_FILE (JSON, siehe sources.example.json). Ohne Datei wird
+das bisherige einzelne Handy verwendet. Alle Quellen werden parallel geholt,
+jede in einen eigenen Ordner <ts>_<name>; Bandbreite und Plattenplatz teilen sich
+alle Quellen. Dateien lokaler Quellen werden flach nach Aufnahmedatum benannt
+(abschaltbar mit "rename_by_date": false).
+"""
+import os
+import re
+import json
+import time
+import shutil
+import fnmatch
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from copyfilessh import copy_files_ssh, progress
+from create_image_video import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
+import metrics
+
+SOURCES_FILE = os.environ.get("SOURCES_FILE", "/app/sources.json")
+
+DEFAULT_CONFIG = {
+    "bandwidth_bytes_per_second": 0,    # 0 = unbegrenzt, gilt für alle Quellen zusammen
+    "disk_budget_bytes": 0,             # 0 = unbegrenzt, maximal kopierte Bytes pro Lauf
+    "min_free_bytes": 0,                # so viel Platz bleibt im Zielordner mindestens frei
+    "max_parallel": 4,
+    "sources": [
+        {
+            "name": "handy",
+            "type": "sftp",
+            "host": "192.168.178.178",
+            "port": 8022,
+            "user": "u0_a371",
+            "password_env": "SSH_PASSWORD",
+            "path": "/data/data/com.termux/files/home/sdcard/dcim/Camera",
+            "move": True
+        }
+    ]
+}
+
+
+def load_sources(path=SOURCES_FILE):
+    """Liest die Quellen-Konfiguration, fehlende Werte kommen aus DEFAULT_CONFIG."""
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+
+    names = set()
+    for source in config["sources"]:
+        if source.get("type", "sftp") not in ("sftp", "local"):
+            raise ValueError(f"Unbekannter Quellentyp: {source.get('type')}")
+        # Name landet im Ordnernamen und Videotitel -> nur unkritische Zeichen
+        # (kein "--" im Namen, das trennt die Quelle im Videotitel ab)
+        source["name"] = re.sub(r"[^A-Za-z0-9]+", "-", source.get("name") or source["path"]).strip("-")
+        if source["name"] in names:
+            raise ValueError(f"Quelle doppelt: {source['name']}")
+        for key in ("include", "exclude"):
+            # Ein einzelner String würde als Liste einzelner Zeichen gelesen
+            if key in source and not (isinstance(source[key], list) and all(isinstance(p, str) for p in source[key])):
+                raise ValueError(f"Quelle {source['name']}: {key} muss eine Liste von Mustern sein")
+        names.add(source["name"])
+    return config
+
+
+# ===================== Budgets =====================
+class BandwidthLimiter:
+    """Gemeinsame Bandbreite für alle Quellen (Token-Bucket ohne Burst)."""
+
+    def __init__(self, bytes_per_second):
+        self.rate = bytes_per_second
+        self.lock = threading.Lock()
+        self.next_free = time.monotonic()
+
+    def consume(self, nbytes):
+        if not self.rate or nbytes <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.next_free = max(self.next_free, now) + nbytes / self.rate
+            wait = self.next_free - now
+        time.sleep(wait)
+
+
+class DiskBudget:
+    """Maximal kopierte Bytes pro Lauf und Mindest-Freiplatz im Zielordner."""
+
+    def __init__(self, folder, max_bytes=0, min_free_bytes=0):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.min_free_bytes = min_free_bytes
+        self.lock = threading.Lock()
+        self.used = 0
+        self.free_at_start = shutil.disk_usage(folder).free
+
+    def reserve(self, nbytes):
+        with self.lock:
+            if self.max_bytes and self.used + nbytes > self.max_bytes:
+                return False
+            # Parallele Kopien sind in disk_usage noch nicht sichtbar -> auch gegen den Startwert prüfen
+            free = min(shutil.disk_usage(self.folder).free, self.free_at_start - self.used)
+            if free - nbytes < self.min_free_bytes:
+                return False
+            self.used += nbytes
+            return True
+
+
+def make_filter(source):
+    """Dateifilter aus `include` / `exclude` (Glob-Muster, Groß-/Kleinschreibung egal)."""
+    include = [p.lower() for p in source.get("include", ["*"])]
+    exclude = [p.lower() for p in source.get("exclude", [])]
+
+    def file_filter(name):
+        name = name.lower()
+        return any(fnmatch.fnmatchcase(name, p) for p in include) and not any(fnmatch.fnmatchcase(name, p) for p in exclude)
+    return file_filter
+
+
+# ===================== Kopieren =====================
+def dated_name(path, taken=()):
+    """
+    Name im Handy-Schema für eine Kameradatei: IMG_<YYYYmmdd>_<HHMMSS>.jpg bzw. VID_<...>.mp4.
+    Aufnahmezeit aus EXIF (DateTimeOriginal, sonst DateTime), sonst Änderungszeit der Datei.
+    Andere Dateien behalten ihren Namen. Ist der Name in `taken`, wird die Zeit um eine
+    Sekunde weitergezählt.
+    """
+    folder, file = os.path.split(path)
+    ext = os.path.splitext(file)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        prefix = "IMG"
+    elif ext in VIDEO_EXTENSIONS:
+        prefix = "VID"
+    else:
+        return file
+
+    shot = None
+    if prefix == "IMG":
+        try:
+            with Image.open(path) as img:
+                exif = img.getexif()
+                value = exif.get_ifd(0x8769).get(36867) or exif.get(306)
+            shot = datetime.strptime(value.strip("\x00 "), "%Y:%m:%d %H:%M:%S")
+        except Exception:
+            pass  # keine (lesbare) EXIF-Zeit
+    if shot is None:
+        shot = datetime.fromtimestamp(os.path.getmtime(path))
+
+    while True:
+        name = f"{prefix}_{shot:%Y%m%d_%H%M%S}{ext}"
+        if name not in taken:
+            return name
+        shot += timedelta(seconds=1)
+
+
+def copy_files_local(source, destination, move=False, file_filter=None, reserve=None, throttle=None, rename=False):
+    """
+    Wie copy_files_ssh, aber für lokal eingehängte Quellen (z.B. Kamerakarten).
+    Mit `rename` landen alle Dateien direkt in `destination` und heißen wie Handy-Dateien
+    (siehe dated_name), sonst bleibt die Ordnerstruktur erhalten. Kamerakarten haben
+    DCIM/100XXXXX/IMG_1234.JPG, was Rendern und Hochladen sonst nicht zuordnen können.
+    """
+    start = time.time()
+    taken = set(os.listdir(destination)) if rename and os.path.isdir(destination) else set()
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for file in sorted(files):
+            src = os.path.join(root, file)
+            size = os.path.getsize(src)
+            if file_filter and not file_filter(file):
+                continue
+            if reserve and not reserve(size):
+                print(f"{file}: Budget erschöpft, bleibt liegen")
+                continue
+
+            if rename:
+                name = dated_name(src, taken)
+                # Gleichnamige andere Dateien behalten ihren Unterordner
+                dst = os.path.join(destination, name if name not in taken else os.path.relpath(src, source))
+                taken.add(name)
+            else:
+                dst = os.path.join(destination, os.path.relpath(src, source))
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            with metrics.stage("local_transfer"):
+                transferred = 0
+                with open(src, "rb") as fsrc, open(dst + ".part", "wb") as fdst:
+                    while chunk := fsrc.read(1024 * 1024):
+                        fdst.write(chunk)
+                        transferred += len(chunk)
+                        if throttle:
+                            throttle(len(chunk))
+                        progress(src, transferred, size)
+                shutil.copystat(src, dst + ".part")
+                os.replace(dst + ".part", dst)
+            metrics.count("local_transfer", nbytes=size)
+            if move:
+                os.remove(src)
+    return time.time() - start
+
+
+def fetch_source(source, destination, limiter, budget):
+    """Holt eine Quelle nach `destination`. Fehler werden ausgegeben, nicht geworfen."""
+    options = {
+        "move": source.get("move", False),
+        "file_filter": make_filter(source),
+        "reserve": budget.reserve,
+        "throttle": limiter.consume if limiter.rate else None
+    }
+    try:
+        print(f"[{source['name']}] Kopiere von {source['path']} nach {destination}")
+        with metrics.stage("ingest"):
+            if source.get("type", "sftp") == "local":
+                duration = copy_files_local(source["path"], destination, rename=source.get("rename_by_date", True), **options)
+            else:
+                password = source.get("password")
+                if password is None and source.get("password_env"):
+                    password = os.environ.get(source["password_env"])
+                duration = copy_files_ssh(
+                    host=source["host"], port=source.get("port", 22), user=source["user"], password=password,
+                    source=source["path"], destination=destination, **options
+                )
+        print(f"\n[{source['name']}] Fertig in {duration:.1f} Sekunden")
+    except Exception as e:
+        print(f"[{source['name']}] Fehler beim Kopieren:", e)
+
+
+def fetch_sources(config, root):
+    """
+    Holt alle Quellen parallel nach <root>/<ts>_<name> und gibt [(Ordner, Quellenname)] zurück.
+    Die Gesamtdauer richtet sich nach der langsamsten Quelle, nicht nach der Summe.
+    """
+    today = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(root, exist_ok=True)
+    limiter = BandwidthLimiter(config["bandwidth_bytes_per_second"])
+    budget = DiskBudget(root, config["disk_budget_bytes"], config["min_free_bytes"])
+
+    targets = []
+    for source in config["sources"]:
+        destination = os.path.abspath(os.path.join(root, f"{today}_{source['name']}"))
+        os.makedirs(destination, exist_ok=True)
+        targets.append((destination, source))
+
+    workers = max(1, min(config["max_parallel"], len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fetch_source, source, destination, limiter, budget) for destination, source in targets]
+    # Kopierfehler gibt fetch_source selbst aus, alles andere (z.B. Konfiguration) wird weitergereicht
+    for future in futures:
+        future.result()
+
+    return [(destination, source["name"]) for destination, source in targets]
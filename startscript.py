@@ -1,13 +1,41 @@
-from flask import Flask, request
-import subprocess
+from flask import Flask, request, jsonify
+import threading
 import sys
+import metrics
+from profiling import profile_mode
+from youtube import start_youtube_job, JOB_LOCK
 
 app = Flask(__name__)
 
 @app.route("/start", methods=["POST"])
 def start_script():
-   subprocess.Popen(["python3", "/app/youtube.py"])
+   # Job im selben Prozess starten, damit /metrics die laufenden Stufen sieht
+   # ?profile=cpu|mem|all schreibt Profile pro Stufe neben den Job-Bericht (1 = cpu, siehe profiling.py),
+   # ?profile=0 schaltet ab, ohne Parameter entscheidet PROFILE_JOBS
+   profile = request.args.get("profile")
+   if profile is not None:
+      profile = profile_mode(profile) or False
+
+   # Lock hier nehmen, sonst bekommen zwei schnelle POSTs beide 200; der Job-Thread gibt ihn frei
+   if not JOB_LOCK.acquire(blocking=False):
+      return "Sync läuft bereits", 409
+   try:
+      threading.Thread(target=start_youtube_job, kwargs={"profile": profile, "locked": True}, daemon=True).start()
+   except Exception:
+      JOB_LOCK.release()
+      raise
    return "Sync erfolgreich gestartet!", 200
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+   return metrics.render_prometheus(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@app.route("/report", methods=["GET"])
+def report():
+   last = metrics.last_report()
+   if last is None:
+      return jsonify({"error": "Noch kein Job beendet"}), 404
+   return jsonify(last), 200
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,215 @@
+"""
+Verhalten des Job-Journals: abgebrochene Läufe werden fortgesetzt, fertige Arbeit nicht wiederholt.
+Rendern und YouTube werden durch Fakes ersetzt.
+"""
+import os
+
+import pytest
+
+import create_image_video
+import youtube
+from journal import JobJournal
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x")
+
+
+class FakePipeline:
+    def __init__(self):
+        self.rendered = []
+        self.uploaded = []
+        self.html_builds = 0
+        self.catalog_fetches = 0
+        self.fail_render = set()
+        self.fail_upload = set()
+
+    def render_date_video(self, date, images, titles, output_folder, video_size, duration_per_image, source=""):
+        if date in self.fail_render:
+            raise RuntimeError(f"render {date}")
+        self.rendered.append(date)
+        output_path = os.path.join(output_folder, create_image_video.tag_with_source(f"VID_{date}", source) + ".mp4")
+        touch(output_path)
+        return output_path
+
+    def upload_video(self, service, file_path, title=None, description=""):
+        name = os.path.basename(file_path)
+        if name in self.fail_upload:
+            raise RuntimeError(f"upload {name}")
+        self.uploaded.append(name)
+        return {"videoId": f"id{len(self.uploaded)}", "title": title or os.path.splitext(name)[0], "duration": "PT3S"}
+
+    def get_youtube_videos(self, service):
+        self.catalog_fetches += 1
+        return []
+
+    def create_youtube_html(self, videos):
+        self.html_builds += 1
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    fake = FakePipeline()
+    monkeypatch.setattr(youtube, "HANDY_DIR", str(tmp_path / "handy"))
+    monkeypatch.setattr(youtube, "get_youtube_service", lambda: object())
+    monkeypatch.setattr(youtube, "get_youtube_videos", fake.get_youtube_videos)
+    monkeypatch.setattr(youtube, "upload_video", fake.upload_video)
+    monkeypatch.setattr(youtube, "create_youtube_html", fake.create_youtube_html)
+    monkeypatch.setattr(create_image_video, "render_date_video", fake.render_date_video)
+    return fake
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return JobJournal(str(tmp_path / "handy" / "journal.json"))
+
+
+def make_folder(tmp_path, name="20240105_180000_handy"):
+    folder = tmp_path / "handy" / name
+    touch(str(folder / "IMG_20240101_100000_Urlaub.jpg"))
+    touch(str(folder / "IMG_20240102_100000.jpg"))
+    touch(str(folder / "VID_20240101_120000.mp4"))
+    return str(folder)
+
+
+def test_failed_run_resumes_without_repeating_work(tmp_path, pipeline, journal):
+    folder = make_folder(tmp_path)
+    journal.add_folder(folder, source="handy")
+
+    # 1. Lauf: zweites Datum lässt sich nicht rendern
+    pipeline.fail_render = {"20240102"}
+    with pytest.raises(RuntimeError):
+        youtube.process_pending_folders(journal)
+    assert pipeline.rendered == ["20240101"]
+    assert pipeline.uploaded == []
+
+    # 2. Lauf: nur das fehlende Datum rendern, ein Upload bricht ab
+    pipeline.fail_render = set()
+    pipeline.fail_upload = {"VID_20240102--handy.mp4"}
+    with pytest.raises(RuntimeError):
+        youtube.process_pending_folders(journal)
+    assert pipeline.rendered == ["20240101", "20240102"]
+    assert os.path.isdir(folder)
+    uploaded_first = list(pipeline.uploaded)
+    assert "VID_20240102--handy.mp4" not in uploaded_first
+    # Was schon hochgeladen ist, kommt trotz Fehler auf die Seite
+    assert pipeline.html_builds == 1
+
+    # 3. Lauf (neues Journal-Objekt wie nach einem Neustart): nur der fehlende Upload
+    pipeline.fail_upload = set()
+    youtube.process_pending_folders(JobJournal(journal.path))
+    assert pipeline.rendered == ["20240101", "20240102"]
+    assert pipeline.uploaded[:len(uploaded_first)] == uploaded_first
+    assert sorted(pipeline.uploaded) == ["VID_20240101--handy.mp4", "VID_20240101_120000.mp4", "VID_20240102--handy.mp4"]
+    assert not os.path.exists(folder)
+    assert pipeline.html_builds == 2
+
+    # 4. Lauf: nichts mehr zu tun
+    fetches = pipeline.catalog_fetches
+    youtube.process_pending_folders(JobJournal(journal.path))
+    assert pipeline.catalog_fetches == fetches
+    assert pipeline.html_builds == 2
+
+
+def test_orphaned_folder_is_picked_up(tmp_path, pipeline, journal):
+    folder = make_folder(tmp_path, "20231231_080000")
+
+    youtube.process_pending_folders(journal)
+
+    assert sorted(pipeline.rendered) == ["20240101", "20240102"]
+    assert len(pipeline.uploaded) == 3
+    assert not os.path.exists(folder)
+
+
+def test_orphaned_folder_skips_videos_already_in_catalog(tmp_path, pipeline, journal, monkeypatch):
+    # Ordner von vor dem Journal, das Video ist schon auf YouTube
+    catalog = [{"videoId": "old", "title": "VID_20231230_120000", "duration": "PT9S"}]
+    monkeypatch.setattr(youtube, "get_youtube_videos", lambda service: list(catalog))
+    folder = tmp_path / "handy" / "20231231_080000"
+    touch(str(folder / "VID_20231230_120000.mp4"))
+
+    youtube.process_pending_folders(journal)
+
+    assert pipeline.uploaded == []
+    assert not folder.exists()
+    assert pipeline.html_builds == 0
+
+
+def test_done_folder_is_skipped(tmp_path, pipeline, journal):
+    folder = make_folder(tmp_path)
+    journal.add_folder(folder)
+    journal.mark_upload_done(folder, kept=["IMG_20240102_100000.jpg"])
+
+    youtube.process_pending_folders(journal)
+
+    assert pipeline.rendered == []
+    assert pipeline.uploaded == []
+    assert os.path.isdir(folder)
+
+
+def test_folder_with_unprocessed_images_is_kept(tmp_path, pipeline, journal):
+    folder = make_folder(tmp_path)
+    touch(os.path.join(folder, "DCIM", "100CANON", "IMG_1234.JPG"))
+    journal.add_folder(folder)
+
+    youtube.process_pending_folders(journal)
+
+    assert os.path.isdir(folder)
+    assert journal.folder_info(folder)["kept"] == [os.path.join("DCIM", "100CANON", "IMG_1234.JPG")]
+
+    # Wird beim nächsten Lauf nicht erneut verarbeitet
+    uploads = len(pipeline.uploaded)
+    youtube.process_pending_folders(journal)
+    assert len(pipeline.uploaded) == uploads
+
+
+def test_empty_folder_needs_no_catalog_or_html(tmp_path, pipeline, journal):
+    folder = tmp_path / "handy" / "20240105_180000_handy"
+    folder.mkdir(parents=True)
+    journal.add_folder(str(folder))
+
+    youtube.process_pending_folders(journal)
+
+    assert not folder.exists()
+    assert pipeline.catalog_fetches == 0
+    assert pipeline.html_builds == 0
+
+
+def test_same_date_slideshow_from_earlier_run_is_uploaded(tmp_path, pipeline, journal, monkeypatch):
+    # Morgens schon VID_20240101 hochgeladen, abends neue Bilder vom selben Tag
+    monkeypatch.setattr(pipeline, "get_youtube_videos", lambda service: [{"videoId": "old", "title": "VID_20240101", "duration": "PT6S"}])
+    monkeypatch.setattr(youtube, "get_youtube_videos", pipeline.get_youtube_videos)
+    folder = tmp_path / "handy" / "20240101_200000_handy"
+    touch(str(folder / "IMG_20240101_190000.jpg"))
+    journal.add_folder(str(folder))
+
+    youtube.process_pending_folders(journal)
+
+    assert pipeline.uploaded == ["VID_20240101.mp4"]
+    assert not folder.exists()
+
+
+def test_same_named_videos_from_two_sources_are_both_uploaded(tmp_path, pipeline, journal, monkeypatch):
+    titles = []
+    upload = pipeline.upload_video
+
+    def upload_video(service, file_path, title=None, description=""):
+        titles.append(title)
+        return upload(service, file_path, title, description)
+    monkeypatch.setattr(youtube, "upload_video", upload_video)
+
+    for source in ("handy", "tablet"):
+        folder = tmp_path / "handy" / f"20240105_180000_{source}"
+        touch(str(folder / "IMG_20240101_100000.jpg"))
+        touch(str(folder / "VID_20240101_120000.mp4"))
+        journal.add_folder(str(folder), source=source)
+
+    youtube.process_pending_folders(journal)
+
+    assert sorted(titles) == [
+        "VID_20240101--handy", "VID_20240101--tablet",
+        "VID_20240101_120000--handy", "VID_20240101_120000--tablet"
+    ]
+    assert os.listdir(tmp_path / "handy") == ["journal.json"]
@@ -0,0 +1,236 @@
+"""
+Quellen ohne SFTP: Konfiguration, Filter, Budgets, Umbenennen und Kopieren lokaler Quellen.
+"""
+import os
+import json
+import threading
+from collections import namedtuple
+
+import pytest
+from PIL import Image
+
+import sources
+
+DiskUsage = namedtuple("DiskUsage", "total used free")
+
+
+def write(path, data=b"x", mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def write_jpeg(path, taken=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    img = Image.new("RGB", (4, 4))
+    exif = img.getexif()
+    if taken:
+        exif.get_ifd(0x8769)[36867] = taken
+    img.save(path, exif=exif)
+
+
+def local_config(tmp_path, **source):
+    config = {"sources": [{"name": "kamera", "type": "local", "path": str(tmp_path / "card"), **source}]}
+    path = tmp_path / "sources.json"
+    path.write_text(json.dumps(config))
+    return sources.load_sources(str(path))
+
+
+# ===================== Konfiguration =====================
+def test_load_sources_defaults_without_file(tmp_path):
+    config = sources.load_sources(str(tmp_path / "missing.json"))
+    assert [s["name"] for s in config["sources"]] == ["handy"]
+    assert config["max_parallel"] == sources.DEFAULT_CONFIG["max_parallel"]
+
+
+def test_load_sources_sanitizes_names(tmp_path):
+    config = local_config(tmp_path, name="Kamera -- Urlaub/2024")
+    assert config["sources"][0]["name"] == "Kamera-Urlaub-2024"
+
+
+@pytest.mark.parametrize("source", [
+    {"type": "ftp"},
+    {"include": "*.jpg"},
+    {"exclude": ["*.thm", 3]},
+])
+def test_load_sources_rejects_bad_config(tmp_path, source):
+    with pytest.raises(ValueError):
+        local_config(tmp_path, **source)
+
+
+def test_load_sources_rejects_duplicate_names(tmp_path):
+    path = tmp_path / "sources.json"
+    path.write_text(json.dumps({"sources": [
+        {"name": "karte", "type": "local", "path": "/a"},
+        {"name": "karte!", "type": "local", "path": "/b"}
+    ]}))
+    with pytest.raises(ValueError):
+        sources.load_sources(str(path))
+
+
+def test_make_filter_include_and_exclude_ignore_case():
+    file_filter = sources.make_filter({"include": ["*.jpg", "*.mp4"], "exclude": ["*_tmp.*"]})
+    assert file_filter("IMG_0001.JPG")
+    assert file_filter("clip.mp4")
+    assert not file_filter("IMG_0001.THM")
+    assert not file_filter("clip_TMP.mp4")
+
+
+# ===================== Budgets =====================
+def test_bandwidth_limiter_spreads_bytes_over_time(monkeypatch):
+    waits = []
+    monkeypatch.setattr(sources.time, "sleep", waits.append)
+    limiter = sources.BandwidthLimiter(1000)
+
+    limiter.consume(100)
+    limiter.consume(100)
+
+    assert waits[0] == pytest.approx(0.1, abs=0.02)
+    assert waits[1] == pytest.approx(0.2, abs=0.02)
+
+
+def test_bandwidth_limiter_is_shared_between_threads(monkeypatch):
+    waits = []
+    monkeypatch.setattr(sources.time, "sleep", waits.append)
+    limiter = sources.BandwidthLimiter(1000)
+
+    threads = [threading.Thread(target=limiter.consume, args=(100,)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert max(waits) == pytest.approx(0.5, abs=0.05)
+
+
+def test_bandwidth_limiter_without_rate_never_waits(monkeypatch):
+    waits = []
+    monkeypatch.setattr(sources.time, "sleep", waits.append)
+    sources.BandwidthLimiter(0).consume(10 ** 9)
+    assert waits == []
+
+
+def test_disk_budget_limits_copied_bytes(tmp_path):
+    budget = sources.DiskBudget(str(tmp_path), max_bytes=100)
+    assert budget.reserve(60)
+    assert not budget.reserve(50)
+    assert budget.reserve(40)
+    assert budget.used == 100
+
+
+def test_disk_budget_keeps_min_free_space(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources.shutil, "disk_usage", lambda path: DiskUsage(1000, 0, 1000))
+    budget = sources.DiskBudget(str(tmp_path), min_free_bytes=700)
+    assert budget.reserve(200)
+    # disk_usage sieht die laufende Kopie noch nicht, der Startwert schon
+    assert not budget.reserve(200)
+    assert budget.reserve(100)
+
+
+# ===================== Umbenennen =====================
+def test_dated_name_uses_exif_capture_time(tmp_path):
+    path = str(tmp_path / "IMG_0001.JPG")
+    write_jpeg(path, taken="2024:03:05 10:11:12")
+    assert sources.dated_name(path) == "IMG_20240305_101112.jpg"
+
+
+def test_dated_name_falls_back_to_mtime(tmp_path):
+    mtime = sources.datetime(2023, 12, 30, 12, 0, 0).timestamp()
+    image = str(tmp_path / "IMG_0002.JPG")
+    write_jpeg(image)
+    os.utime(image, (mtime, mtime))
+    video = str(tmp_path / "MVI_0003.MP4")
+    write(video, mtime=mtime)
+
+    assert sources.dated_name(image) == "IMG_20231230_120000.jpg"
+    assert sources.dated_name(video) == "VID_20231230_120000.mp4"
+
+
+def test_dated_name_bumps_taken_names_by_a_second(tmp_path):
+    path = str(tmp_path / "IMG_0001.JPG")
+    write_jpeg(path, taken="2024:03:05 10:11:59")
+    taken = {"IMG_20240305_101159.jpg", "IMG_20240305_101200.jpg"}
+    assert sources.dated_name(path, taken) == "IMG_20240305_101201.jpg"
+
+
+def test_dated_name_keeps_other_files(tmp_path):
+    path = str(tmp_path / "INFO.XML")
+    write(path)
+    assert sources.dated_name(path, {"INFO.XML"}) == "INFO.XML"
+
+
+# ===================== Kopieren =====================
+def test_copy_files_local_flattens_camera_card(tmp_path):
+    card = tmp_path / "card"
+    write_jpeg(str(card / "DCIM" / "100CANON" / "IMG_0001.JPG"), taken="2024:03:05 10:11:12")
+    write_jpeg(str(card / "DCIM" / "101CANON" / "IMG_0001.JPG"), taken="2024:03:05 10:11:12")
+    write(str(card / "DCIM" / "100CANON" / "INFO.XML"))
+    write(str(card / "DCIM" / "101CANON" / "INFO.XML"))
+    out = tmp_path / "out"
+    out.mkdir()
+
+    sources.copy_files_local(str(card), str(out), move=True, rename=True)
+
+    assert sorted(f for f in os.listdir(out) if os.path.isfile(out / f)) == [
+        "IMG_20240305_101112.jpg", "IMG_20240305_101113.jpg", "INFO.XML"
+    ]
+    # Gleichnamige andere Dateien behalten ihren Unterordner statt sich zu überschreiben
+    assert os.listdir(out / "DCIM" / "101CANON") == ["INFO.XML"]
+    assert not any(files for _, _, files in os.walk(card))
+
+
+def test_copy_files_local_keeps_structure_without_rename(tmp_path):
+    card = tmp_path / "card"
+    write(str(card / "sub" / "a.mp4"), b"abc")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    sources.copy_files_local(str(card), str(out))
+
+    assert (out / "sub" / "a.mp4").read_bytes() == b"abc"
+    assert (card / "sub" / "a.mp4").exists()
+    assert not (out / "sub" / "a.mp4.part").exists()
+
+
+def test_copy_files_local_respects_filter_and_budget(tmp_path):
+    card = tmp_path / "card"
+    write(str(card / "a.mp4"), b"1" * 60)
+    write(str(card / "b.mp4"), b"2" * 60)
+    write(str(card / "c.thm"), b"3")
+    out = tmp_path / "out"
+    out.mkdir()
+    budget = sources.DiskBudget(str(out), max_bytes=100)
+
+    sources.copy_files_local(str(card), str(out), move=True,
+                             file_filter=sources.make_filter({"exclude": ["*.thm"]}), reserve=budget.reserve)
+
+    assert os.listdir(out) == ["a.mp4"]
+    # Was nicht kopiert wurde, bleibt auf der Karte
+    assert sorted(os.listdir(card)) == ["b.mp4", "c.thm"]
+
+
+def test_fetch_sources_copies_all_sources_in_parallel(tmp_path):
+    for name in ("a", "b"):
+        write(str(tmp_path / name / "clip.mp4"), mtime=sources.datetime(2024, 1, 1, 12).timestamp())
+    config = dict(sources.DEFAULT_CONFIG, sources=[
+        {"name": "a", "type": "local", "path": str(tmp_path / "a")},
+        {"name": "b", "type": "local", "path": str(tmp_path / "b")}
+    ])
+
+    folders = sources.fetch_sources(config, str(tmp_path / "handy"))
+
+    assert [name for _, name in folders] == ["a", "b"]
+    for folder, _ in folders:
+        assert os.listdir(folder) == ["VID_20240101_120000.mp4"]
+
+
+def test_fetch_sources_reports_worker_errors(tmp_path, monkeypatch):
+    def broken_filter(source):
+        raise ValueError("kaputt")
+    monkeypatch.setattr(sources, "make_filter", broken_filter)
+    config = dict(sources.DEFAULT_CONFIG, sources=[{"name": "a", "type": "local", "path": str(tmp_path)}])
+
+    with pytest.raises(ValueError):
+        sources.fetch_sources(config, str(tmp_path / "handy"))
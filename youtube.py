@@ -9,20 +9,30 @@ import re
 import webbrowser
 import pdb
 import shutil
+import threading
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.http import MediaFileUpload
 from google.auth.transport.requests import Request
 from html import escape
 from collections import defaultdict
-from copyfilessh import copy_files_ssh
 from tqdm import tqdm
 from datetime import datetime
-from create_image_video import create_image_videos
+from create_image_video import create_image_videos, parse_image_name, tag_with_source, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, SOURCE_SEPARATOR
+from journal import JobJournal
+from sources import load_sources, fetch_sources
+import metrics
+from profiling import profile_mode
 
 TOKEN_FILE = "token.pkl"
 CLIENT_SECRETS_FILE = "client_secret.json"
 SCOPES = ["https://www.googleapis.com/auth/youtube"]
+HANDY_DIR = "/handy"
+# Kamera-Originale tragen Datum und Uhrzeit im Namen, Slideshows nur das Datum
+CAMERA_ORIGINAL = re.compile(r"\d{8}_\d{6}")
+
+# Nur ein Job gleichzeitig, sonst arbeiten zwei Läufe am selben Journal
+JOB_LOCK = threading.Lock()
 
 def get_upload_playlist_id(youtube):
     response = youtube.channels().list(
@@ -33,19 +43,21 @@ def get_upload_playlist_id(youtube):
 
 
 def get_video_duration_ffprobe(file_path):
-    result = subprocess.run(
-        [
-            "ffprobe",
-            "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "format=duration",
-            "-of", "json",
-            file_path
-        ],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
-    )
+    with metrics.stage("ffprobe"):
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v", "error",
+                "-select_streams", "v:0",
+                "-show_entries", "format=duration",
+                "-of", "json",
+                file_path
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    metrics.count("ffprobe")
 
     data = json.loads(result.stdout)
     return float(data["format"]["duration"])
@@ -68,6 +80,12 @@ def seconds_to_iso8601(seconds):
 
 
 def get_all_videos(youtube, upload_playlist_id):
+    with metrics.stage("catalog_fetch"):
+        videos = fetch_all_videos(youtube, upload_playlist_id)
+    metrics.count("catalog_fetch", items=len(videos))
+    return videos
+
+def fetch_all_videos(youtube, upload_playlist_id):
     videos = []
     next_page_token = None
 
@@ -179,7 +197,7 @@ def upload_video(youtube, file_path, title=None, description=""):
     response = None
 
     file_size = os.path.getsize(file_path)
-    with tqdm(total=file_size, unit="B", unit_scale=True, desc=f"Upload {title}") as pbar:
+    with metrics.stage("upload"), tqdm(total=file_size, unit="B", unit_scale=True, desc=f"Upload {title}") as pbar:
         while response is None:
             status, response = request.next_chunk()
             if status:
@@ -187,6 +205,7 @@ def upload_video(youtube, file_path, title=None, description=""):
         # --- sicherstellen, dass Balken 100% ist ---
         if pbar.n < file_size:
             pbar.update(file_size - pbar.n)
+    metrics.count("upload", nbytes=file_size)
 
     print(f"✅ Video hochgeladen: {title}")
 
@@ -203,31 +222,64 @@ def upload_video(youtube, file_path, title=None, description=""):
 
     return video_entry
 
-def upload_all_videos(root_directory):
+def upload_all_videos(root_directory, youtube=None, videos=None, already_uploaded=None, on_uploaded=None, source=""):
+    """
+    Lädt alle Videos unter `root_directory` hoch, die noch nicht auf YouTube sind.
+    - `videos`: bereits geholter Katalog (wird um neue Uploads ergänzt)
+    - `already_uploaded`: relativer Pfad -> YouTube-Eintrag aus dem Journal, wird übersprungen
+    - `on_uploaded(relativer Pfad, Eintrag, neu)` wird für jede Datei aufgerufen, die danach auf YouTube ist
+      (neu=False, wenn ein Video mit dem Dateinamen als Titel schon im Katalog war)
+    - `source`: Quelle, landet im Titel (<name>--<source>) und in der Beschreibung neuer Videos
+    """
 
     uploaded_video_count = 0
-    youtube = get_youtube_service()
-
-    videos = get_youtube_videos(youtube)
+    if youtube is None:
+        youtube = get_youtube_service()
 
-    uploaded_titles = [v["title"] for v in videos]
+    if videos is None:
+        videos = get_youtube_videos(youtube)
+    already_uploaded = already_uploaded or {}
 
-    extensions = [".mts", ".mts2", ".m2ts", ".avi", ".vob", ".mp4", ".mpg"]
+    uploaded_titles = {v["title"]: v for v in videos}
 
     for root, dirs, files in os.walk(root_directory):
         for file in files:
-            if any(file.lower().endswith(ext) for ext in extensions):
+            if file.lower().endswith(VIDEO_EXTENSIONS):
                 path = os.path.join(root, file)
             
                 if not os.path.isfile(path):
                     continue
 
-                if file in uploaded_titles or file.replace("_", " ") in uploaded_titles:
+                rel_path = os.path.relpath(path, root_directory)
+                # Quelle gehört in Titel und Dateinamen-Abgleich, sonst kollidieren gleichnamige Videos zweier Geräte
+                stem, ext = os.path.splitext(file)
+                title = tag_with_source(stem, source)
+                name = title + ext
+                # Originale mit Uhrzeit im Namen (VID_<date>_<HHMMSS>) sind eindeutig und dürfen über den
+                # Titel erkannt werden (auch ohne Quelle, von Läufen vor dem Journal). Slideshows
+                # (VID_<date>[_<title>]) nicht: ein neues Video vom selben Tag hätte denselben Titel.
+                known = None
+                if CAMERA_ORIGINAL.search(stem):
+                    known = next((t for t in (title, stem, stem.replace("_", " ")) if t in uploaded_titles), None)
+                if known is None:
+                    known = next((t for t in (name, name.replace("_", " ")) if t in uploaded_titles), None)
+                if rel_path in already_uploaded:
+                    print(f"{file} laut Journal bereits hochgeladen überspringen")
+                    # Katalog kann neuen Uploads hinterherhinken
+                    if already_uploaded[rel_path]["title"] not in uploaded_titles:
+                        videos.append(already_uploaded[rel_path])
+                        uploaded_titles[already_uploaded[rel_path]["title"]] = already_uploaded[rel_path]
+                elif known is not None:
                     print(f"{file} wurde bereits hochgeladen überspringen")
+                    if on_uploaded:
+                        on_uploaded(rel_path, uploaded_titles[known], False)
                 else:
-                    v = upload_video(youtube, path)
+                    v = upload_video(youtube, path, title=title, description=f"Quelle: {source}" if source else "")
                     videos.append(v)
+                    uploaded_titles[v["title"]] = v
                     uploaded_video_count += 1
+                    if on_uploaded:
+                        on_uploaded(rel_path, v, True)
 
     print(f"{uploaded_video_count} Videos auf YouTube hochgeladen")
 
@@ -261,7 +313,8 @@ def generate_html(videos):
 
     # --- 1️⃣ Metadaten extrahieren ---
     for v in videos:
-        raw = v.get("title", "")
+        # Quelle (--<source>) gehört nicht zum angezeigten Titel
+        raw = re.sub(rf"{SOURCE_SEPARATOR}[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*$", "", v.get("title", ""))
         
         # Datum aus Titel
         m_date = re.search(r'(\d{8})', raw)
@@ -505,44 +558,145 @@ def create_youtube_html(videos_sorted = None):
     if videos_sorted == None:
         videos_sorted = get_sorted_videos()
 
-    html_content = generate_html(videos_sorted)
+    with metrics.stage("html_build"):
+        html_content = generate_html(videos_sorted)
 
-    OUTPUT_HTML = "/html/index.html"
-    with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
-        f.write(html_content)    
+        OUTPUT_HTML = "/html/index.html"
+        with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
+            f.write(html_content)
+    metrics.count("html_build", items=len(videos_sorted), nbytes=len(html_content.encode("utf-8")))
 
 
 def copy_handy_media():
+    """Holt alle konfigurierten Quellen parallel, gibt [(Ordner, Quellenname)] zurück."""
+    return fetch_sources(load_sources(), HANDY_DIR)
+
+def folder_is_empty(path):
+    # Reste abgebrochener Kopien (.part) zählen nicht
+    for root, dirs, files in os.walk(path):
+        if any(not f.endswith(".part") for f in files):
+            return False
+    return True
+
+def unprocessed_files(path, journal):
+    """
+    Dateien im Ordner, die nicht (als Teil eines Videos) auf YouTube gelandet sind.
+    Bilder zählen als verarbeitet, wenn das Slideshow-Video ihres Datums hochgeladen ist.
+    """
+    rendered = journal.rendered_videos(path)
+    uploaded = journal.uploaded(path)
+    missing = []
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            if file.endswith(".part"):
+                continue
+            rel_path = os.path.relpath(os.path.join(root, file), path)
+            if file.lower().endswith(VIDEO_EXTENSIONS):
+                done = rel_path in uploaded
+            elif file.lower().endswith(IMAGE_EXTENSIONS) and root == path:
+                # create_image_videos rendert nur Bilder direkt im Ordner
+                parsed = parse_image_name(file)
+                done = parsed is not None and rendered.get(parsed[0]) in uploaded
+            else:
+                done = False
+            if not done:
+                missing.append(rel_path)
+    return sorted(missing)
+
+def process_pending_folders(journal):
+    """
+    Rendert und lädt alle Ordner mit offener Arbeit laut Journal hoch und baut danach die HTML-Seite.
+    Schon gerenderte Daten und hochgeladene Dateien werden übersprungen.
+    Ein Ordner wird nur gelöscht, wenn jede Datei darin (als Video oder Teil einer Slideshow) hochgeladen ist.
+    """
+    folders = []
+    for path in journal.pending_folders(HANDY_DIR):
+        if folder_is_empty(path):
+            # Nichts Neues kopiert -> kein Katalog-Abruf, kein HTML-Neubau
+            shutil.rmtree(path)
+            journal.remove_folder(path)
+        else:
+            folders.append(path)
 
-    HOST = "192.168.178.178"
-    USER = "u0_a371"
-    PORT = 8022
-    PWD = os.environ.get("SSH_PASSWORD")
-
-    SOURCE = "/data/data/com.termux/files/home/sdcard/dcim/Camera"
-
-    today = datetime.now().strftime("%Y%m%d_%H%M%S")
-    DEST = os.path.abspath(f"/handy/{today}")
-    os.makedirs(DEST, exist_ok=True)
+    if not folders and not journal.html_pending:
+        print("Keine offenen Ordner")
+        return
 
+    youtube = get_youtube_service()
+    videos = get_youtube_videos(youtube)
+    errors = []
+
+    for path in folders:
+        source = journal.folder_info(path).get("source")
+        print(f"Verarbeite {path}" + (f" (Quelle {source})" if source else ""))
+        try:
+            if not journal.render_done(path):
+                create_image_videos(
+                    path,
+                    skip_dates=journal.rendered_dates(path),
+                    on_rendered=lambda date, video, p=path: journal.mark_rendered(p, date, video),
+                    source=source
+                )
+                journal.mark_render_done(path)
+
+            upload_all_videos(
+                path, youtube, videos,
+                already_uploaded=journal.uploaded(path),
+                on_uploaded=lambda file, entry, new, p=path: journal.mark_uploaded(p, file, entry, new),
+                source=source
+            )
+            kept = unprocessed_files(path, journal)
+            journal.mark_upload_done(path, kept)
+
+            if kept:
+                print(f"{path} bleibt liegen, {len(kept)} Dateien in keinem hochgeladenen Video: {', '.join(kept[:10])}")
+            else:
+                shutil.rmtree(path)
+                journal.remove_folder(path)
+        except Exception as e:
+            print(f"Fehler bei {path}:", e)
+            errors.append(e)
+
+    if journal.html_pending:
+        create_youtube_html(sorted(videos, key=lambda v: v["title"].lower()))
+        journal.mark_html_done()
+
+    if errors:
+        raise errors[0]
+
+def start_youtube_job(profile=None, locked=False):
+    """Startet einen Job, falls keiner läuft. Mit `locked=True` hält der Aufrufer JOB_LOCK schon, er wird hier freigegeben."""
+    if not locked and not JOB_LOCK.acquire(blocking=False):
+        print("Job läuft bereits")
+        return
     try:
-        print(f"Kopiere von {SOURCE} auf {HOST} nach {DEST}")
-        duration = copy_files_ssh(host=HOST, port=PORT, user=USER, password=PWD, source=SOURCE, destination=DEST, move=True)
-        print(f"\nFertig in {duration:.1f} Sekunden")
-    except Exception as e:
-        print("Fehler beim Kopieren:", e)
+        run_youtube_job(profile)
+    finally:
+        JOB_LOCK.release()
 
-    return DEST
+def run_youtube_job(profile=None):
+    if profile is None:
+        profile = profile_mode(os.environ.get("PROFILE_JOBS"))
 
-def start_youtube_job():
-    path = copy_handy_media()
-    create_image_videos(path)
+    job_id = metrics.start_job(profile=profile)
+    error = None
     try:
-        videos = upload_all_videos(path)
-        shutil.rmtree(path)
-        create_youtube_html(videos)
+        # Neue Medien pro Quelle in einen eigenen Ordner, danach alle offenen Ordner (auch von abgebrochenen Läufen)
+        journal = JobJournal()
+        for path, source in copy_handy_media():
+            journal.add_folder(path, source=source)
+        try:
+            process_pending_folders(journal)
+        except Exception as e:
+            error = e
+            print("Fehler beim upload: ", e)
     except Exception as e:
-        print("Fehler beim upload: ", e)
+        error = e
+        raise
+    finally:
+        report = metrics.finish_job(error)
+        if report:
+            print(f"Job {job_id} Bericht: {report}")
 
 if __name__ == "__main__":
     start_youtube_job()